@@ -14,17 +14,48 @@ Environment Variables:
         (0.0-1.0, default: 0.7).
     LLM_COMMIT_DYNAMIC_LENGTH: Optional. Set to "true" to generate longer, multi-line
         commit messages based on change size (default: false, one sentence only).
+    LLM_COMMIT_CACHE: Optional. Set to "1" to cache generated messages on disk and
+        reuse them when the same diff is staged again (default: off).
+    LLM_COMMIT_CACHE_TTL: Optional. Cache entry lifetime in seconds
+        (default: 86400).
 """
 
+import functools
+import hashlib
+import json
 import os
 import re
+import shlex
 import subprocess
 import sys
 import tempfile
+import time
 from dataclasses import dataclass, field
-from typing import Protocol
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
 
-from openai import OpenAI
+if TYPE_CHECKING:
+    # Imported lazily at runtime (see _make_client) to keep CLI startup fast
+    from openai import OpenAI
+
+try:
+    # orjson is an optional speedup for cache (de)serialization; the stdlib
+    # json module is a drop-in fallback
+    import orjson
+
+    def _json_loads(data: bytes) -> dict:
+        return orjson.loads(data)
+
+    def _json_dumps(obj: dict) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:
+
+    def _json_loads(data: bytes) -> dict:
+        return json.loads(data)
+
+    def _json_dumps(obj: dict) -> bytes:
+        return json.dumps(obj).encode("utf-8")
 
 # Constants
 CONVENTIONAL_COMMIT_TYPES = [
@@ -40,6 +71,11 @@ CONVENTIONAL_COMMIT_TYPES = [
     "chore",
     "revert",
 ]
+CONVENTIONAL_COMMIT_TYPES_CSV = ", ".join(CONVENTIONAL_COMMIT_TYPES)
+CONVENTIONAL_COMMIT_TYPES_SET = frozenset(CONVENTIONAL_COMMIT_TYPES)
+
+# Matches a Conventional Commits subject prefix, e.g. "feat(scope)!:"
+_TYPE_PREFIX_RE = re.compile(r"([a-z]+)(\([^)]*\))?!?:")
 
 
 @dataclass
@@ -62,33 +98,32 @@ class CommitConfig:
     )
     small_change_threshold: int = 50  # lines
     large_change_threshold: int = 200  # lines
+    max_diff_chars: int = 64000  # cap on diff text sent to the LLM
     small_change_tokens: int = 100
     medium_change_tokens: int = 200
     large_change_tokens: int = 400
 
 
-def count_diff_lines(diff: str) -> int:
+def count_diff_lines(diff: bytes | str) -> int:
     """Count the number of changed lines in a git diff"""
-    lines = diff.splitlines()
-    count = 0
-    for line in lines:
-        # Don't count file metadata lines (+++/---), only single +/- lines
-        if (
-            (line.startswith("+") or line.startswith("-"))
-            and not line.startswith("+++")
-            and not line.startswith("---")
-        ):
-            count += 1
-    return count
+    # count runs at C speed; subtract file metadata lines (+++/---) so
+    # only single +/- change lines are counted
+    if isinstance(diff, bytes):
+        b = b"\n" + diff
+        return b.count(b"\n+") + b.count(b"\n-") - b.count(b"\n+++") - b.count(b"\n---")
+    d = "\n" + diff
+    return d.count("\n+") + d.count("\n-") - d.count("\n+++") - d.count("\n---")
 
 
 class GitCommand(Protocol):
     """Protocol for git command execution"""
 
-    def get_diff(self) -> str: ...
+    def get_diff(self) -> bytes: ...
     def get_editor(self) -> str: ...
     def commit(self, message: str) -> None: ...
     def get_staged_files(self) -> list[str]: ...
+    def get_diff_stats(self) -> tuple[list[str], int]: ...
+    def get_staged_files_and_diff(self) -> tuple[list[str], int, bytes]: ...
 
 
 class RiskyFileDetector:
@@ -102,6 +137,18 @@ class RiskyFileDetector:
         r"secrets?\.(yml|yaml|json|toml)$",
     ]
 
+    # Fast path for the default patterns: the suffix anchors run as one
+    # C-level str.endswith, a substring check covers "credentials.*", and
+    # only the secrets filename pattern needs the regex engine
+    _SUFFIXES = (".env", ".secret", "_key")
+    _SECRETS_RE = re.compile(r"secrets?\.(yml|yaml|json|toml)$")
+
+    def __init__(self, patterns: list[str] | None = None):
+        if patterns is None:
+            self._re = None
+        else:
+            self._re = re.compile("|".join(f"(?:{p})" for p in patterns))
+
     def detect_risky_files(self, files: list[str]) -> list[str]:
         """
         Check for potentially risky files in the staged changes.
@@ -112,40 +159,75 @@ class RiskyFileDetector:
         Returns:
             List of file paths that match risky patterns
         """
+        if self._re is not None:
+            return [file for file in files if self._re.search(file)]
+        return [
+            file
+            for file in files
+            if file.endswith(self._SUFFIXES)
+            or "credentials" in file
+            or self._SECRETS_RE.search(file)
+        ]
+
+
+# Splits a unified diff into per-file sections, keeping the headers
+_DIFF_HEADER_RE = re.compile(r"(?m)^(?=diff --git )")
+
+# Matches a response wrapped in a Markdown code fence, e.g. ```text\n...\n```
+_FENCE_RE = re.compile(r"\A\s*```[\w-]*\n?(.*?)\n?```\s*\Z", re.S)
 
-        risky_files = []
-        for file in files:
-            for pattern in self.DEFAULT_PATTERNS:
-                if re.search(pattern, file):
-                    risky_files.append(file)
-                    break
-        return risky_files
+# Matches a textual +/- change line; absent from binary-only diffs, which
+# carry "Binary files ... differ" markers instead
+_CHANGE_LINE_RE = re.compile(r"(?m)^[+-]")
+
+
+def _is_binary_only(diff: str) -> bool:
+    """Return True if the staged diff touches only binary files"""
+    return "Binary files " in diff and _CHANGE_LINE_RE.search(diff) is None
+
+
+# On-disk cache for generated messages, enabled via LLM_COMMIT_CACHE=1
+_CACHE_DIR = Path(os.path.expanduser("~/.cache/git-llm-commit"))
+_CACHE_DEFAULT_TTL = 86400  # seconds
 
 
 class GitCommandLine:
     """Git command implementation using subprocess"""
 
-    def get_diff(self) -> str:
+    def get_diff(self) -> bytes:
+        # Returned as bytes; the caller decodes exactly once rather than
+        # paying a decode inside every consumer of the diff
         try:
-            return subprocess.check_output(
-                ["git", "diff", "--cached"], universal_newlines=True
-            )
+            return subprocess.check_output(["git", "diff", "--cached"])
         except subprocess.CalledProcessError as e:
             raise RuntimeError("Unable to obtain staged diff") from e
 
+    _editor: str | None = None
+
     def get_editor(self) -> str:
-        try:
-            process = subprocess.Popen(
-                ["git", "var", "GIT_EDITOR"], stdout=subprocess.PIPE
-            )
-            if process.stdout is None:
-                raise RuntimeError("Failed to get git editor")
-            return process.stdout.read().decode("utf-8").strip()
-        except subprocess.SubprocessError as e:
-            raise RuntimeError(f"Error getting git editor: {e}") from e
+        # GIT_EDITOR cannot change mid-run, so resolve it once per instance
+        if self._editor is None:
+            try:
+                self._editor = subprocess.check_output(
+                    ["git", "var", "GIT_EDITOR"], text=True
+                ).strip()
+            except subprocess.SubprocessError as e:
+                raise RuntimeError(f"Error getting git editor: {e}") from e
+        return self._editor
 
     def commit(self, message: str) -> None:
-        subprocess.run(["git", "commit", "-m", message])
+        # Piping via -F - avoids argv length limits and shell mangling of
+        # multi-line messages; --cleanup=strip trims trailing whitespace and
+        # comment lines as an interactive commit would
+        try:
+            subprocess.run(
+                ["git", "commit", "--cleanup=strip", "-F", "-"],
+                input=message,
+                text=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError("git commit failed") from e
 
     def get_staged_files(self) -> list[str]:
         """Get list of staged files"""
@@ -157,23 +239,172 @@ class GitCommandLine:
         except subprocess.CalledProcessError as e:
             raise RuntimeError("Unable to get staged files") from e
 
+    def get_diff_stats(self) -> tuple[list[str], int]:
+        """Get staged file paths and total changed line count in one call"""
+        try:
+            output = subprocess.check_output(
+                ["git", "diff", "--cached", "--numstat", "-z"]
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError("Unable to get staged diff stats") from e
+
+        files: list[str] = []
+        total_lines = 0
+        records = output.split(b"\0")
+        index = 0
+        while index < len(records):
+            record = records[index]
+            if not record:
+                index += 1
+                continue
+            added, deleted, path = record.split(b"\t", 2)
+            if path:
+                index += 1
+            else:
+                # Rename/copy: old and new paths follow as separate records
+                path = records[index + 2]
+                index += 3
+            files.append(path.decode("utf-8", errors="replace"))
+            # Binary files report "-" instead of line counts
+            if added != b"-":
+                total_lines += int(added) + int(deleted)
+        return files, total_lines
+
+    def get_staged_files_and_diff(self) -> tuple[list[str], int, bytes]:
+        """
+        Get staged file paths, changed line count, and the diff from a
+        single git invocation.
+
+        Returns:
+            Tuple of (staged file paths, total changed lines, unified diff
+            as undecoded bytes)
+        """
+        try:
+            output = subprocess.check_output(
+                ["git", "diff", "--cached", "--numstat", "-p", "-z"]
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError("Unable to obtain staged diff") from e
+
+        # The numstat records come first, NUL-terminated; a blank record
+        # separates them from the patch text
+        files: list[str] = []
+        total_lines = 0
+        rest = output
+        while rest:
+            record, _, rest = rest.partition(b"\0")
+            if not record:
+                break
+            added, deleted, path = record.split(b"\t", 2)
+            if not path:
+                # Rename/copy: old and new paths follow as separate records
+                _, _, rest = rest.partition(b"\0")
+                path, _, rest = rest.partition(b"\0")
+            files.append(path.decode("utf-8", errors="replace"))
+            # Binary files report "-" instead of line counts
+            if added != b"-":
+                total_lines += int(added) + int(deleted)
+        return files, total_lines, rest
+
 
 class CommitMessageGenerator:
     """Generates commit messages using OpenAI's API"""
 
-    def __init__(self, llm_client: OpenAI, config: CommitConfig):
+    def __init__(self, llm_client: "OpenAI", config: CommitConfig):
         self.llm_client = llm_client
         self.config = config
+        # The system message is static per config; build it once instead of
+        # re-assembling the same ~1 KB string on every generate() call
+        self._system_message = self._get_system_message()
+        # Its digest makes a stable key for server-side prompt caching of
+        # the shared prefix
+        self._prompt_cache_key = hashlib.blake2b(
+            self._system_message.encode("utf-8"), digest_size=8
+        ).hexdigest()
+        # Size tiers as (upper bound, detail level, max tokens); one ladder
+        # shared by prompt wording and token sizing so they can't drift apart
+        self._tiers: tuple[tuple[float, str, int], ...] = (
+            (config.small_change_threshold, "concise", config.small_change_tokens),
+            (config.large_change_threshold, "moderate", config.medium_change_tokens),
+            (float("inf"), "detailed", config.large_change_tokens),
+        )
 
-    def _get_user_message(self, diff: str) -> str:
+    def _tier(self, diff_size: int) -> tuple[str, int]:
+        """Return the (detail_level, max_tokens) tier for a diff size"""
+        for upper_bound, detail_level, max_tokens in self._tiers:
+            if diff_size <= upper_bound:
+                return detail_level, max_tokens
+        raise AssertionError("unreachable: final tier bound is infinite")
+
+    def _cache_enabled(self) -> bool:
+        return os.getenv("LLM_COMMIT_CACHE") == "1"
+
+    def _cache_path(self, diff: str) -> Path:
+        """Return the cache file path for the given diff and config"""
+        payload = repr(
+            (
+                self.config.model,
+                self.config.temperature,
+                self.config.one_sentence_only,
+                diff,
+            )
+        )
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return _CACHE_DIR / f"{digest}.json"
+
+    def _read_cached_message(self, diff: str) -> str | None:
+        """Return a cached message for the diff, or None if absent/expired"""
+        try:
+            entry = _json_loads(self._cache_path(diff).read_bytes())
+        except (OSError, ValueError):
+            return None
+        ttl = int(os.getenv("LLM_COMMIT_CACHE_TTL", str(_CACHE_DEFAULT_TTL)))
+        if time.time() - entry.get("created", 0) > ttl:
+            return None
+        return entry.get("message")
+
+    def _write_cached_message(self, diff: str, message: str) -> None:
+        """Store a generated message for the diff; failures are non-fatal"""
+        try:
+            _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            self._cache_path(diff).write_bytes(
+                _json_dumps({"message": message, "created": time.time()})
+            )
+        except OSError:
+            pass
+
+    def _truncate_diff(self, diff: str) -> str:
+        """
+        Cap the diff at config.max_diff_chars to bound input token count.
+
+        Whole per-file sections are kept until the budget is spent; the rest
+        is replaced by a one-line summary of what was omitted.
+        """
+        if len(diff) <= self.config.max_diff_chars:
+            return diff
+
+        kept: list[str] = []
+        omitted: list[str] = []
+        used = 0
+        for section in _DIFF_HEADER_RE.split(diff):
+            if not omitted and used + len(section) <= self.config.max_diff_chars:
+                kept.append(section)
+                used += len(section)
+            else:
+                omitted.append(section)
+
+        omitted_lines = sum(count_diff_lines(section) for section in omitted)
+        return "".join(kept) + (
+            f"\n... {len(omitted)} more file(s), "
+            f"{omitted_lines} changed lines omitted ..."
+        )
+
+    def _get_user_message(self, diff: str, diff_size: int | None = None) -> str:
         """Generate the user message for the API request"""
-        diff_size = count_diff_lines(diff)
-        if diff_size <= self.config.small_change_threshold:
-            detail_level = "concise"
-        elif diff_size <= self.config.large_change_threshold:
-            detail_level = "moderate"
-        else:
-            detail_level = "detailed"
+        if diff_size is None:
+            diff_size = count_diff_lines(diff)
+        diff = self._truncate_diff(diff)
+        detail_level, _ = self._tier(diff_size)
 
         length_instruction = (
             "The commit message should be a single sentence and only include a "
@@ -190,20 +421,34 @@ class CommitMessageGenerator:
             f"change with {diff_size} lines modified."
         )
 
-    def generate(self, diff: str) -> str:
-        """Generate a commit message for the given diff"""
-        system_message = self._get_system_message()
-        user_message = self._get_user_message(diff)
+    def generate(self, diff: str, diff_size: int | None = None) -> str:
+        """
+        Generate a commit message for the given diff.
+
+        Args:
+            diff: The staged diff text
+            diff_size: Pre-computed changed line count; counted from the diff
+                if not provided
+        """
+        if self._cache_enabled():
+            cached = self._read_cached_message(diff)
+            if cached is not None:
+                print(cached)
+                return cached
+
+        system_message = self._system_message
+
+        # Count once and share between the user message and token sizing
+        if diff_size is None:
+            diff_size = count_diff_lines(diff)
+        user_message = self._get_user_message(diff, diff_size)
 
         # Determine max tokens based on diff size
-        diff_size = count_diff_lines(diff)
-        if diff_size <= self.config.small_change_threshold:
-            max_tokens = self.config.small_change_tokens
-        elif diff_size <= self.config.large_change_threshold:
-            max_tokens = self.config.medium_change_tokens
-        else:
-            max_tokens = self.config.large_change_tokens
+        _, max_tokens = self._tier(diff_size)
 
+        # Stream the response so the user sees tokens as they arrive instead
+        # of waiting for the full completion
+        parts: list[str] = []
         try:
             response = self.llm_client.chat.completions.create(
                 model=self.config.model,
@@ -213,15 +458,43 @@ class CommitMessageGenerator:
                 ],
                 temperature=self.config.temperature,
                 max_tokens=max_tokens,
+                stream=True,
+                # extra_body keeps this compatible with providers (and older
+                # API versions) that don't expose prompt_cache_key directly
+                extra_body={"prompt_cache_key": self._prompt_cache_key},
             )
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    sys.stdout.write(delta)
+                    sys.stdout.flush()
+                    parts.append(delta)
+            if parts:
+                sys.stdout.write("\n")
         except Exception as e:
             error_msg = f"Error calling OpenAI API: {e}"
             raise RuntimeError(error_msg) from e
 
-        if not response.choices[0].message.content:
+        if not parts:
             raise RuntimeError("Received empty response from OpenAI API")
 
-        return response.choices[0].message.content.strip().strip("`")
+        text = "".join(parts).strip()
+        fenced = _FENCE_RE.match(text)
+        message = fenced.group(1).strip() if fenced else text.strip("`")
+
+        # O(1) sanity check on the subject prefix; the user can still edit
+        prefix = _TYPE_PREFIX_RE.match(message)
+        if prefix and prefix.group(1) not in CONVENTIONAL_COMMIT_TYPES_SET:
+            print(
+                f"Warning: '{prefix.group(1)}' is not a Conventional Commits type",
+                file=sys.stderr,
+            )
+
+        if self._cache_enabled():
+            self._write_cached_message(diff, message)
+        return message
 
     def _get_system_message(self) -> str:
         if self.config.one_sentence_only:
@@ -232,7 +505,7 @@ class CommitMessageGenerator:
                 "following format:\n\n"
                 "  <type>[optional scope]: <description>\n\n"
                 "Where:\n"
-                f"  - type is one of: {', '.join(CONVENTIONAL_COMMIT_TYPES)}.\n"
+                f"  - type is one of: {CONVENTIONAL_COMMIT_TYPES_CSV}.\n"
                 "  - scope is optional and should be included if it clarifies the "
                 "affected area of code.\n"
                 "  - The description is a concise summary of the change in a single "
@@ -252,7 +525,7 @@ class CommitMessageGenerator:
                 "  [optional body]\n\n"
                 "  [optional footer(s)]\n\n"
                 "Where:\n"
-                f"  - type is one of: {', '.join(CONVENTIONAL_COMMIT_TYPES)}.\n"
+                f"  - type is one of: {CONVENTIONAL_COMMIT_TYPES_CSV}.\n"
                 "  - scope is optional and should be included if it clarifies the "
                 "affected area of code.\n"
                 "  - The description is a concise summary of the change.\n"
@@ -270,6 +543,83 @@ class CommitMessageGenerator:
             )
 
 
+class FastPathGenerator:
+    """Generates commit messages locally for trivial diffs, skipping the LLM"""
+
+    def __init__(self, config: CommitConfig):
+        self.config = config
+        # A diff only counts as trivial well below the small-change threshold
+        self.max_lines = config.small_change_threshold // 5
+
+    def try_generate(
+        self, diff: str, files: list[str], line_count: int | None = None
+    ) -> str | None:
+        """
+        Synthesize a commit message for a trivial diff, or return None.
+
+        Only fires when the change is small and carries an unambiguous
+        Conventional Commits type signal; everything else goes to the LLM.
+
+        Args:
+            diff: The staged diff text
+            files: List of staged file paths
+            line_count: Pre-computed changed line count; counted from the
+                diff if not provided
+
+        Returns:
+            A commit message, or None when the diff needs the LLM
+        """
+        if not files:
+            return None
+        if line_count is None:
+            line_count = count_diff_lines(diff)
+        if line_count > self.max_lines:
+            return None
+
+        if all(file.endswith(".md") for file in files):
+            if len(files) == 1:
+                return f"docs: update {files[0]}"
+            return f"docs: update {len(files)} documentation files"
+
+        if all(self._is_test_file(file) for file in files):
+            if len(files) == 1:
+                return f"test: update {files[0]}"
+            return f"test: update {len(files)} test files"
+
+        if len(files) == 1 and line_count < 5 and self._is_new_file_addition(diff):
+            first_line = self._first_added_line(diff)
+            if first_line:
+                scope = Path(files[0]).stem
+                return f"feat({scope}): add {first_line[:60]}"
+
+        return None
+
+    @staticmethod
+    def _is_test_file(path: str) -> bool:
+        name = os.path.basename(path)
+        return (
+            path.startswith("tests/")
+            or "/tests/" in path
+            or name.startswith("test_")
+            or name.endswith("_test.py")
+        )
+
+    @staticmethod
+    def _is_new_file_addition(diff: str) -> bool:
+        """Check that the diff adds a new file and removes nothing"""
+        d = "\n" + diff
+        return "new file mode" in diff and d.count("\n-") - d.count("\n---") == 0
+
+    @staticmethod
+    def _first_added_line(diff: str) -> str | None:
+        for line in diff.splitlines():
+            if line.startswith("+") and not line.startswith("+++"):
+                stripped = line[1:].strip()
+                if stripped:
+                    return stripped
+        return None
+
+
 class CommitMessageEditor:
     """Handles editing of commit messages"""
 
@@ -279,20 +629,27 @@ class CommitMessageEditor:
             tmp_path = tmp.name
 
         try:
-            subprocess.call([editor, tmp_path])
-            with open(tmp_path) as tmp:
-                return tmp.read()
+            # shlex.split supports editors with arguments, e.g. "code -w"
+            subprocess.call(shlex.split(editor) + [tmp_path])
+            return Path(tmp_path).read_text()
         finally:
             os.unlink(tmp_path)
 
 
-def prompt_user(message: str) -> str:
-    """Prompts user for input and returns response"""
+def display_message(message: str) -> None:
+    """Print a commit message block to stdout"""
     print("\nGenerated commit message:")
     print("------------------------")
     print(message)
     print("------------------------")
-    return input("\nDo you want to commit with this message? (y/n/e[dit]): ").lower()
+
+
+def prompt_user() -> str:
+    """Prompts user for input and returns the first response character"""
+    # Normalizing to one character lets "yes"/" Y " work; invalid input only
+    # re-prompts this single line, never the (possibly long) message block
+    response = input("\nDo you want to commit with this message? (y/n/e[dit]): ")
+    return response.strip().lower()[:1]
 
 
 def prompt_risky_files(files: list[str]) -> bool:
@@ -303,6 +660,16 @@ def prompt_risky_files(files: list[str]) -> bool:
     return input("\nCommit anyway? (y/N): ").lower().startswith("y")
 
 
+@functools.lru_cache(maxsize=4)
+def _make_client(api_key: str, base_url: str | None) -> "OpenAI":
+    """Build (and memoize) an OpenAI client for the given credentials"""
+    # Imported here so the early exits in llm_commit (and --help) never pay
+    # the openai import cost
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+
 def llm_commit(api_key: str, dynamic_length: bool = False) -> None:
     """Main function to handle the commit process"""
     git = GitCommandLine()
@@ -310,16 +677,19 @@ def llm_commit(api_key: str, dynamic_length: bool = False) -> None:
     if dynamic_length:
         os.environ["LLM_COMMIT_DYNAMIC_LENGTH"] = "true"
     config = CommitConfig()
-    base_url = (
-        "https://openrouter.ai/api/v1" if os.getenv("OPENROUTER_API_KEY") else None
-    )
-    llm_client = OpenAI(api_key=api_key, base_url=base_url)
-    generator = CommitMessageGenerator(llm_client, config)
     editor = CommitMessageEditor()
 
     try:
+        # One git call yields the staged files, line count, and diff text
+        staged_files, line_count, raw_diff = git.get_staged_files_and_diff()
+        # Decode once up front; everything downstream works with str
+        diff = (
+            raw_diff.decode("utf-8", errors="replace")
+            if isinstance(raw_diff, bytes)
+            else raw_diff
+        )
+
         # Check for risky files first
-        staged_files = git.get_staged_files()
         detector = RiskyFileDetector()
         risky_files = detector.detect_risky_files(staged_files)
 
@@ -328,16 +698,37 @@ def llm_commit(api_key: str, dynamic_length: bool = False) -> None:
             sys.exit(1)
 
         # Proceed with normal commit flow
-        diff = git.get_diff()
         if not diff.strip():
             msg = "No staged changes found. Please stage your changes and try again."
             print(msg)
             sys.exit(0)
 
-        commit_message = generator.generate(diff)
+        # Binary-only changes carry no text the LLM could read
+        if _is_binary_only(diff):
+            commit_message = f"chore: update {len(staged_files)} binary file(s)"
+        else:
+            # Trivial diffs with an unambiguous type can skip the LLM entirely
+            fast_path = FastPathGenerator(config)
+            commit_message = fast_path.try_generate(diff, staged_files, line_count)
+        if commit_message is not None:
+            display_message(commit_message)
+        else:
+            base_url = (
+                "https://openrouter.ai/api/v1"
+                if os.getenv("OPENROUTER_API_KEY")
+                else None
+            )
+            llm_client = _make_client(api_key, base_url)
+            generator = CommitMessageGenerator(llm_client, config)
+
+            # Print the header up front; the message streams in below it
+            print("\nGenerated commit message:")
+            print("------------------------")
+            commit_message = generator.generate(diff, line_count)
+            print("------------------------")
 
         while True:
-            response = prompt_user(commit_message)
+            response = prompt_user()
 
             if response == "y":
                 git.commit(commit_message)
@@ -348,6 +739,7 @@ def llm_commit(api_key: str, dynamic_length: bool = False) -> None:
             elif response == "e":
                 git_editor = git.get_editor()
                 commit_message = editor.edit_message(commit_message, git_editor)
+                display_message(commit_message)
                 continue
             else:
                 print(
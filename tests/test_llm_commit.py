@@ -1,18 +1,22 @@
+import importlib
 import os
 import subprocess
 import sys
 from unittest.mock import MagicMock, call, patch
 
 import pytest
-from openai.types.chat import ChatCompletion, ChatCompletionMessage
-from openai.types.chat.chat_completion import Choice
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
 
 from git_llm_commit import main
 from git_llm_commit.llm_commit import (
     CONVENTIONAL_COMMIT_TYPES,
+    CONVENTIONAL_COMMIT_TYPES_CSV,
+    CONVENTIONAL_COMMIT_TYPES_SET,
     CommitConfig,
     CommitMessageEditor,
     CommitMessageGenerator,
+    FastPathGenerator,
     GitCommandLine,
     RiskyFileDetector,
     count_diff_lines,
@@ -20,6 +24,38 @@ from git_llm_commit.llm_commit import (
     prompt_user,
 )
 
+llm_commit_module = importlib.import_module("git_llm_commit.llm_commit")
+
+
+@pytest.fixture(autouse=True)
+def clear_client_cache():
+    """Keep memoized clients from one test's OpenAI patch leaking into the next"""
+    llm_commit_module._make_client.cache_clear()
+    yield
+    llm_commit_module._make_client.cache_clear()
+
+
+def make_stream(content):
+    """Build a mock streaming response yielding the content as a single chunk"""
+    return iter(
+        [
+            ChatCompletionChunk(
+                id="mock-id",
+                choices=[
+                    Choice(
+                        index=0,
+                        delta=ChoiceDelta(content=content, role="assistant"),
+                        finish_reason="stop",
+                    )
+                ],
+                created=1234567890,
+                model="gpt-4-turbo",
+                object="chat.completion.chunk",
+            )
+        ]
+    )
+
+
 # Test data
 SAMPLE_DIFF = """diff --git a/test.py b/test.py
 index 1234567..89abcdef 100644
@@ -52,6 +88,36 @@ def test_risky_file_detector():
     assert "test/test_app.py" not in risky_files
 
 
+def test_risky_file_detector_matches_default_patterns():
+    """Test that the fast path matches the documented DEFAULT_PATTERNS"""
+    import re
+
+    paths = [
+        "src/.env",
+        "deploy/.secret",
+        "config/credentials.json",
+        "my_credentials_helper.py",
+        "keys/api_key",
+        "secrets.yml",
+        "config/secret.yaml",
+        "src/app.py",
+        "environments.py",
+        "monkey.py",
+    ]
+    union = re.compile(
+        "|".join(f"(?:{p})" for p in RiskyFileDetector.DEFAULT_PATTERNS)
+    )
+    expected = [p for p in paths if union.search(p)]
+    assert RiskyFileDetector().detect_risky_files(paths) == expected
+
+
+def test_risky_file_detector_custom_patterns():
+    """Test risky file detection with custom patterns"""
+    detector = RiskyFileDetector(patterns=[r"\.pem$"])
+    risky_files = detector.detect_risky_files(["server.pem", "src/.env"])
+    assert risky_files == ["server.pem"]
+
+
 def test_get_staged_files_success():
     """Test successful staged files retrieval"""
     git = GitCommandLine()
@@ -73,38 +139,293 @@ def test_get_staged_files_error():
             git.get_staged_files()
 
 
+def test_get_diff_stats_success():
+    """Test staged file and line count retrieval from numstat output"""
+    git = GitCommandLine()
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.return_value = b"3\t1\tsrc/app.py\0-\t-\tlogo.png\0"
+        files, total_lines = git.get_diff_stats()
+        assert files == ["src/app.py", "logo.png"]
+        assert total_lines == 4
+        mock_check_output.assert_called_once_with(
+            ["git", "diff", "--cached", "--numstat", "-z"]
+        )
+
+
+def test_get_diff_stats_rename():
+    """Test numstat parsing for renamed files"""
+    git = GitCommandLine()
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.return_value = b"2\t2\t\0old/name.py\0new/name.py\0"
+        files, total_lines = git.get_diff_stats()
+        assert files == ["new/name.py"]
+        assert total_lines == 4
+
+
+def test_get_diff_stats_error():
+    """Test diff stats error handling"""
+    git = GitCommandLine()
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.side_effect = subprocess.CalledProcessError(1, "cmd")
+        with pytest.raises(RuntimeError, match="Unable to get staged diff stats"):
+            git.get_diff_stats()
+
+
+def test_get_staged_files_and_diff_success():
+    """Test combined retrieval of staged files, line count, and diff"""
+    git = GitCommandLine()
+    output = b"2\t1\tsrc/app.py\0\0" + SAMPLE_DIFF.encode()
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.return_value = output
+        files, total_lines, diff = git.get_staged_files_and_diff()
+        assert files == ["src/app.py"]
+        assert total_lines == 3
+        assert diff == SAMPLE_DIFF.encode()
+        mock_check_output.assert_called_once_with(
+            ["git", "diff", "--cached", "--numstat", "-p", "-z"]
+        )
+
+
+def test_get_staged_files_and_diff_empty():
+    """Test combined retrieval with no staged changes"""
+    git = GitCommandLine()
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.return_value = b""
+        files, total_lines, diff = git.get_staged_files_and_diff()
+        assert files == []
+        assert total_lines == 0
+        assert diff == b""
+
+
+def test_get_staged_files_and_diff_error():
+    """Test combined retrieval error handling"""
+    git = GitCommandLine()
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.side_effect = subprocess.CalledProcessError(1, "cmd")
+        with pytest.raises(RuntimeError, match="Unable to obtain staged diff"):
+            git.get_staged_files_and_diff()
+
+
+def test_make_client_is_memoized():
+    """Test that repeated calls with the same credentials reuse one client"""
+    with patch("openai.OpenAI") as mock_openai:
+        first = llm_commit_module._make_client("fake-api-key", None)
+        second = llm_commit_module._make_client("fake-api-key", None)
+        assert first is second
+        mock_openai.assert_called_once_with(api_key="fake-api-key", base_url=None)
+
+        llm_commit_module._make_client("fake-api-key", "https://openrouter.ai/api/v1")
+        assert mock_openai.call_count == 2
+
+
+def test_tier_boundaries():
+    """Test that the shared size-tier lookup honors the config thresholds"""
+    config = CommitConfig()
+    generator = CommitMessageGenerator(MagicMock(), config)
+    assert generator._tier(config.small_change_threshold) == (
+        "concise",
+        config.small_change_tokens,
+    )
+    assert generator._tier(config.small_change_threshold + 1) == (
+        "moderate",
+        config.medium_change_tokens,
+    )
+    assert generator._tier(config.large_change_threshold + 1) == (
+        "detailed",
+        config.large_change_tokens,
+    )
+
+
+def test_conventional_commit_type_constants():
+    """Test that the derived type constants stay in sync with the list"""
+    assert ", ".join(CONVENTIONAL_COMMIT_TYPES) == CONVENTIONAL_COMMIT_TYPES_CSV
+    assert frozenset(CONVENTIONAL_COMMIT_TYPES) == CONVENTIONAL_COMMIT_TYPES_SET
+
+
+def test_generate_warns_on_unknown_commit_type(capsys):
+    """Test that an unknown type prefix in the response triggers a warning"""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream("feature: add new greeting function")
+    )
+
+    generator = CommitMessageGenerator(mock_client, CommitConfig())
+    result = generator.generate(SAMPLE_DIFF)
+    assert result == "feature: add new greeting function"
+    assert "not a Conventional Commits type" in capsys.readouterr().err
+
+
+def test_generate_no_warning_on_known_commit_type(capsys):
+    """Test that a valid type prefix produces no warning"""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
+    )
+
+    generator = CommitMessageGenerator(mock_client, CommitConfig())
+    generator.generate(SAMPLE_DIFF)
+    assert capsys.readouterr().err == ""
+
+
+def test_fast_path_docs_change():
+    """Test local message synthesis for a pure documentation change"""
+    fast_path = FastPathGenerator(CommitConfig())
+    diff = "+Some new docs line"
+    assert fast_path.try_generate(diff, ["README.md"]) == "docs: update README.md"
+    assert (
+        fast_path.try_generate(diff, ["README.md", "docs/usage.md"])
+        == "docs: update 2 documentation files"
+    )
+
+
+def test_fast_path_test_change():
+    """Test local message synthesis for a pure test change"""
+    fast_path = FastPathGenerator(CommitConfig())
+    diff = "+assert something"
+    assert (
+        fast_path.try_generate(diff, ["tests/test_app.py"])
+        == "test: update tests/test_app.py"
+    )
+
+
+def test_fast_path_new_file_addition():
+    """Test local message synthesis for a small new-file addition"""
+    fast_path = FastPathGenerator(CommitConfig())
+    diff = (
+        "diff --git a/src/greet.py b/src/greet.py\n"
+        "new file mode 100644\n"
+        "--- /dev/null\n"
+        "+++ b/src/greet.py\n"
+        "@@ -0,0 +1,2 @@\n"
+        "+def greet():\n"
+        '+    return "hi"\n'
+    )
+    assert fast_path.try_generate(diff, ["src/greet.py"]) == (
+        "feat(greet): add def greet():"
+    )
+
+
+def test_fast_path_falls_back_to_llm():
+    """Test that ambiguous or large diffs are left to the LLM"""
+    fast_path = FastPathGenerator(CommitConfig())
+    # Mixed file types
+    assert fast_path.try_generate("+x", ["README.md", "src/app.py"]) is None
+    # Modification of an existing source file
+    assert fast_path.try_generate(SAMPLE_DIFF, ["test.py"]) is None
+    # Too many changed lines
+    big_diff = "\n".join(f"+line {i}" for i in range(50))
+    assert fast_path.try_generate(big_diff, ["README.md"]) is None
+
+
+def test_llm_commit_fast_path_skips_api():
+    """Test that the commit workflow skips OpenAI for trivial doc changes"""
+    with (
+        patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
+        patch("openai.OpenAI") as mock_openai,
+        patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
+    ):
+        mock_git_instance = MagicMock()
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["README.md"],
+            1,
+            "+Some new docs line",
+        )
+        mock_git.return_value = mock_git_instance
+
+        mock_prompt.return_value = "y"
+
+        llm_commit("fake-api-key")
+
+        mock_openai.assert_not_called()
+        mock_git_instance.commit.assert_called_once_with("docs: update README.md")
+
+
+def test_llm_commit_decodes_bytes_diff():
+    """Test that a bytes diff from git is decoded once and handled normally"""
+    with (
+        patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
+        patch("openai.OpenAI") as mock_openai,
+        patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
+    ):
+        mock_git_instance = MagicMock()
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["README.md"],
+            1,
+            b"+Some new docs line",
+        )
+        mock_git.return_value = mock_git_instance
+
+        mock_prompt.return_value = "y"
+
+        llm_commit("fake-api-key")
+
+        mock_openai.assert_not_called()
+        mock_git_instance.commit.assert_called_once_with("docs: update README.md")
+
+
+def test_is_binary_only():
+    """Test binary-only diff detection"""
+    binary_diff = (
+        "diff --git a/logo.png b/logo.png\n"
+        "new file mode 100644\n"
+        "index 0000000..89abcde\n"
+        "Binary files /dev/null and b/logo.png differ\n"
+    )
+    assert llm_commit_module._is_binary_only(binary_diff)
+    assert not llm_commit_module._is_binary_only(SAMPLE_DIFF)
+    assert not llm_commit_module._is_binary_only(binary_diff + SAMPLE_DIFF)
+
+
+def test_llm_commit_binary_only_skips_api():
+    """Test that a binary-only change gets a local chore message"""
+    with (
+        patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
+        patch("openai.OpenAI") as mock_openai,
+        patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
+    ):
+        mock_git_instance = MagicMock()
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["logo.png", "icon.ico"],
+            0,
+            "diff --git a/logo.png b/logo.png\n"
+            "Binary files a/logo.png and b/logo.png differ\n"
+            "diff --git a/icon.ico b/icon.ico\n"
+            "Binary files a/icon.ico and b/icon.ico differ\n",
+        )
+        mock_git.return_value = mock_git_instance
+
+        mock_prompt.return_value = "y"
+
+        llm_commit("fake-api-key")
+
+        mock_openai.assert_not_called()
+        mock_git_instance.commit.assert_called_once_with(
+            "chore: update 2 binary file(s)"
+        )
+
+
 def test_llm_commit_with_risky_files():
     """Test commit workflow with risky files"""
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
         patch("builtins.input") as mock_input,
         patch("builtins.print") as mock_print,
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
-        mock_git_instance.get_staged_files.return_value = SAMPLE_STAGED_FILES
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            SAMPLE_STAGED_FILES,
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="gpt-4-turbo",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
-        mock_openai_instance.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_openai_instance
 
         # First prompt is for risky files, second for commit message
@@ -115,7 +436,7 @@ def test_llm_commit_with_risky_files():
         llm_commit("fake-api-key")
 
         # Verify
-        mock_git_instance.get_staged_files.assert_called_once()
+        mock_git_instance.get_staged_files_and_diff.assert_called_once()
         mock_print.assert_has_calls(
             [
                 call("\nPotentially risky files staged:"),
@@ -143,6 +464,23 @@ index 1234567..89abcdef 100644
     assert count == 3  # One addition, one deletion, one more addition
 
 
+def test_count_diff_lines_first_line():
+    """Test that a change on the very first line of the diff is counted"""
+    assert count_diff_lines("+added line") == 1
+    assert count_diff_lines("-removed line") == 1
+
+
+def test_count_diff_lines_bytes():
+    """Test that byte diffs are counted without decoding"""
+    diff = """diff --git a/test.py b/test.py
+--- a/test.py
++++ b/test.py
+@@ -1,2 +1,2 @@
++def new_feature():
+-def old_feature():"""
+    assert count_diff_lines(diff.encode()) == count_diff_lines(diff) == 2
+
+
 def test_commit_config_defaults():
     """Test CommitConfig initialization with default values"""
     config = CommitConfig()
@@ -219,6 +557,9 @@ def test_commit_config_dynamic_length():
 def test_generate_commit_message_size_based():
     """Test commit message generation with different diff sizes"""
     mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
+    )
     config = CommitConfig()
 
     # Test small change
@@ -253,12 +594,10 @@ def test_get_diff_success():
     """Test successful git diff retrieval"""
     git = GitCommandLine()
     with patch("subprocess.check_output") as mock_check_output:
-        mock_check_output.return_value = SAMPLE_DIFF
+        mock_check_output.return_value = SAMPLE_DIFF.encode()
         result = git.get_diff()
-        assert result == SAMPLE_DIFF
-        mock_check_output.assert_called_once_with(
-            ["git", "diff", "--cached"], universal_newlines=True
-        )
+        assert result == SAMPLE_DIFF.encode()
+        mock_check_output.assert_called_once_with(["git", "diff", "--cached"])
 
 
 def test_get_diff_error():
@@ -270,38 +609,35 @@ def test_get_diff_error():
             git.get_diff()
 
 
-def test_get_editor_no_stdout():
-    """Test git editor retrieval when stdout is None"""
-    git = GitCommandLine()
-    with patch("subprocess.Popen") as mock_popen:
-        mock_process = MagicMock()
-        mock_process.stdout = None
-        mock_popen.return_value = mock_process
-
-        with pytest.raises(RuntimeError, match="Failed to get git editor"):
-            git.get_editor()
-
-
 def test_get_editor_success():
     """Test successful git editor retrieval"""
     git = GitCommandLine()
-    with patch("subprocess.Popen") as mock_popen:
-        mock_process = MagicMock()
-        mock_process.stdout.read.return_value = b"vim\n"
-        mock_popen.return_value = mock_process
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.return_value = "vim\n"
 
         editor = git.get_editor()
         assert editor == "vim"
-        mock_popen.assert_called_once_with(
-            ["git", "var", "GIT_EDITOR"], stdout=subprocess.PIPE
+        mock_check_output.assert_called_once_with(
+            ["git", "var", "GIT_EDITOR"], text=True
         )
 
 
+def test_get_editor_cached():
+    """Test that the editor is resolved once per instance"""
+    git = GitCommandLine()
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.return_value = "vim\n"
+
+        assert git.get_editor() == "vim"
+        assert git.get_editor() == "vim"
+        mock_check_output.assert_called_once()
+
+
 def test_get_editor_error():
     """Test git editor error handling"""
     git = GitCommandLine()
-    with patch("subprocess.Popen") as mock_popen:
-        mock_popen.side_effect = subprocess.SubprocessError("Command failed")
+    with patch("subprocess.check_output") as mock_check_output:
+        mock_check_output.side_effect = subprocess.SubprocessError("Command failed")
         with pytest.raises(RuntimeError, match="Error getting git editor"):
             git.get_editor()
 
@@ -311,28 +647,29 @@ def test_commit_execution():
     git = GitCommandLine()
     with patch("subprocess.run") as mock_run:
         git.commit(SAMPLE_COMMIT_MESSAGE)
-        mock_run.assert_called_once_with(["git", "commit", "-m", SAMPLE_COMMIT_MESSAGE])
+        mock_run.assert_called_once_with(
+            ["git", "commit", "--cleanup=strip", "-F", "-"],
+            input=SAMPLE_COMMIT_MESSAGE,
+            text=True,
+            check=True,
+        )
+
+
+def test_commit_execution_error():
+    """Test git commit error handling"""
+    git = GitCommandLine()
+    with patch("subprocess.run") as mock_run:
+        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
+        with pytest.raises(RuntimeError, match="git commit failed"):
+            git.commit(SAMPLE_COMMIT_MESSAGE)
 
 
 def test_generate_commit_message_with_backticks():
     """Test commit message generation with backticks in response"""
     mock_client = MagicMock()
-    mock_response = ChatCompletion(
-        id="mock-id",
-        choices=[
-            Choice(
-                index=0,
-                message=ChatCompletionMessage(
-                    content="`" + SAMPLE_COMMIT_MESSAGE + "`", role="assistant"
-                ),
-                finish_reason="stop",
-            )
-        ],
-        created=1234567890,
-        model="gpt-4-turbo",
-        object="chat.completion",
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream("`" + SAMPLE_COMMIT_MESSAGE + "`")
     )
-    mock_client.chat.completions.create.return_value = mock_response
 
     config = CommitConfig()
     generator = CommitMessageGenerator(mock_client, config)
@@ -340,25 +677,24 @@ def test_generate_commit_message_with_backticks():
     assert result == SAMPLE_COMMIT_MESSAGE
 
 
+def test_generate_commit_message_with_code_fence():
+    """Test that Markdown code fences around the response are stripped"""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream("```text\n" + SAMPLE_COMMIT_MESSAGE + "\n```")
+    )
+
+    generator = CommitMessageGenerator(mock_client, CommitConfig())
+    result = generator.generate(SAMPLE_DIFF)
+    assert result == SAMPLE_COMMIT_MESSAGE
+
+
 def test_generate_commit_message():
     """Test successful commit message generation"""
     mock_client = MagicMock()
-    mock_response = ChatCompletion(
-        id="mock-id",
-        choices=[
-            Choice(
-                index=0,
-                message=ChatCompletionMessage(
-                    content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                ),
-                finish_reason="stop",
-            )
-        ],
-        created=1234567890,
-        model="gpt-4-turbo",
-        object="chat.completion",
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
     )
-    mock_client.chat.completions.create.return_value = mock_response
 
     config = CommitConfig()
     generator = CommitMessageGenerator(mock_client, config)
@@ -379,6 +715,123 @@ def test_generate_commit_message():
     assert "Git diff:" in call_args["messages"][1]["content"]
 
 
+def test_truncate_diff_keeps_small_diffs_intact():
+    """Test that diffs under the cap are passed through unchanged"""
+    generator = CommitMessageGenerator(MagicMock(), CommitConfig())
+    assert generator._truncate_diff(SAMPLE_DIFF) == SAMPLE_DIFF
+
+
+def test_truncate_diff_caps_large_diffs():
+    """Test that oversized diffs are truncated at file boundaries"""
+    file_a = "diff --git a/a.py b/a.py\n" + "\n".join(
+        f"+line {i}" for i in range(20)
+    )
+    file_b = "diff --git a/b.py b/b.py\n" + "\n".join(
+        f"+line {i}" for i in range(20)
+    )
+    diff = file_a + "\n" + file_b
+
+    config = CommitConfig(max_diff_chars=len(file_a) + 1)
+    generator = CommitMessageGenerator(MagicMock(), config)
+    truncated = generator._truncate_diff(diff)
+
+    assert "a/a.py" in truncated
+    assert "b/b.py" not in truncated
+    assert "1 more file(s), 20 changed lines omitted" in truncated
+
+    user_message = generator._get_user_message(diff)
+    assert "b/b.py" not in user_message
+    # Size classification still reflects the full diff
+    assert "40 lines modified" in user_message
+
+
+def test_system_message_cached_on_instance():
+    """Test that the system message is built once at construction time"""
+    generator = CommitMessageGenerator(MagicMock(), CommitConfig())
+    assert generator._system_message == generator._get_system_message()
+
+
+def test_prompt_cache_key_stable_per_config():
+    """Test that the prompt cache key is stable for identical configs"""
+    config = CommitConfig()
+    generator_a = CommitMessageGenerator(MagicMock(), config)
+    generator_b = CommitMessageGenerator(MagicMock(), CommitConfig())
+    assert generator_a._prompt_cache_key == generator_b._prompt_cache_key
+
+    dynamic_config = CommitConfig()
+    dynamic_config.one_sentence_only = False
+    generator_c = CommitMessageGenerator(MagicMock(), dynamic_config)
+    assert generator_c._prompt_cache_key != generator_a._prompt_cache_key
+
+
+def test_generate_sends_prompt_cache_key():
+    """Test that generate passes the prompt cache key to the API"""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
+    )
+    generator = CommitMessageGenerator(mock_client, CommitConfig())
+    generator.generate(SAMPLE_DIFF)
+
+    call_args = mock_client.chat.completions.create.call_args[1]
+    assert call_args["extra_body"] == {
+        "prompt_cache_key": generator._prompt_cache_key
+    }
+
+
+def test_generate_commit_message_cache_hit(tmp_path, monkeypatch):
+    """Test that a cached message is reused without calling the API"""
+    monkeypatch.setattr(llm_commit_module, "_CACHE_DIR", tmp_path)
+    monkeypatch.setenv("LLM_COMMIT_CACHE", "1")
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
+    )
+
+    generator = CommitMessageGenerator(mock_client, CommitConfig())
+
+    # First call hits the API and populates the cache
+    assert generator.generate(SAMPLE_DIFF) == SAMPLE_COMMIT_MESSAGE
+    assert mock_client.chat.completions.create.call_count == 1
+
+    # Second call is served from the cache
+    assert generator.generate(SAMPLE_DIFF) == SAMPLE_COMMIT_MESSAGE
+    assert mock_client.chat.completions.create.call_count == 1
+
+
+def test_generate_commit_message_cache_expired(tmp_path, monkeypatch):
+    """Test that expired cache entries are ignored"""
+    monkeypatch.setattr(llm_commit_module, "_CACHE_DIR", tmp_path)
+    monkeypatch.setenv("LLM_COMMIT_CACHE", "1")
+    monkeypatch.setenv("LLM_COMMIT_CACHE_TTL", "0")
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
+    )
+
+    generator = CommitMessageGenerator(mock_client, CommitConfig())
+    generator.generate(SAMPLE_DIFF)
+    generator.generate(SAMPLE_DIFF)
+    assert mock_client.chat.completions.create.call_count == 2
+
+
+def test_generate_commit_message_cache_disabled_by_default(tmp_path, monkeypatch):
+    """Test that no cache files are written unless LLM_COMMIT_CACHE=1"""
+    monkeypatch.setattr(llm_commit_module, "_CACHE_DIR", tmp_path)
+    monkeypatch.delenv("LLM_COMMIT_CACHE", raising=False)
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
+    )
+
+    generator = CommitMessageGenerator(mock_client, CommitConfig())
+    generator.generate(SAMPLE_DIFF)
+    assert list(tmp_path.iterdir()) == []
+
+
 def test_generate_commit_message_api_error():
     """Test API error handling in commit message generation"""
     mock_client = MagicMock()
@@ -393,20 +846,9 @@ def test_generate_commit_message_api_error():
 def test_generate_commit_message_empty_response():
     """Test handling of empty API response"""
     mock_client = MagicMock()
-    mock_response = ChatCompletion(
-        id="mock-id",
-        choices=[
-            Choice(
-                index=0,
-                message=ChatCompletionMessage(content="", role="assistant"),
-                finish_reason="stop",
-            )
-        ],
-        created=1234567890,
-        model="gpt-4-turbo",
-        object="chat.completion",
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream("")
     )
-    mock_client.chat.completions.create.return_value = mock_response
 
     config = CommitConfig()
     generator = CommitMessageGenerator(mock_client, config)
@@ -458,37 +900,50 @@ def test_commit_message_editor(tmp_path):
     test_message = "test: initial commit"
     test_editor = "echo"  # Simple command that will succeed
 
-    # Create a temporary file that actually exists
+    # Create a temporary file holding the "edited" content
     test_file = tmp_path / "commit_message.txt"
-    test_file.write_text(test_message)
+    test_file.write_text("modified: test commit")
 
     with (
         patch("tempfile.NamedTemporaryFile") as mock_temp_file,
         patch("subprocess.call") as mock_call,
-        patch("builtins.open", create=True) as mock_open,
     ):
         # Configure the mock to return our real temporary file
         mock_named_temp = MagicMock()
         mock_named_temp.name = str(test_file)
         mock_temp_file.return_value.__enter__.return_value = mock_named_temp
 
-        # Mock the file read after editing
-        mock_file = MagicMock()
-        mock_file.__enter__.return_value.read.return_value = "modified: test commit"
-        mock_open.return_value = mock_file
-
         result = editor.edit_message(test_message, test_editor)
 
         # Verify the editor command was called with correct arguments
         mock_call.assert_called_once_with([test_editor, str(test_file)])
 
-        # Verify the result matches the mocked edited content
+        # Verify the result matches the edited file content
         assert result == "modified: test commit"
 
 
+def test_commit_message_editor_with_args(tmp_path):
+    """Test that editors with arguments (e.g. 'code -w') are split correctly"""
+    editor = CommitMessageEditor()
+    test_file = tmp_path / "commit_message.txt"
+    test_file.write_text("modified: test commit")
+
+    with (
+        patch("tempfile.NamedTemporaryFile") as mock_temp_file,
+        patch("subprocess.call") as mock_call,
+    ):
+        mock_named_temp = MagicMock()
+        mock_named_temp.name = str(test_file)
+        mock_temp_file.return_value.__enter__.return_value = mock_named_temp
+
+        editor.edit_message("test: initial commit", "code -w")
+
+        mock_call.assert_called_once_with(["code", "-w", str(test_file)])
+
+
 def test_prompt_user(monkeypatch):
     """Test user prompt functionality"""
-    test_inputs = ["y", "n", "e", "invalid", "y"]
+    test_inputs = ["y", "n", "e", "x", "y"]
     input_iterator = iter(test_inputs)
 
     def mock_input(_):
@@ -497,47 +952,54 @@ def test_prompt_user(monkeypatch):
     monkeypatch.setattr("builtins.input", mock_input)
 
     # Test 'y' response
-    assert prompt_user("test message") == "y"
+    assert prompt_user() == "y"
 
     # Test 'n' response
-    assert prompt_user("test message") == "n"
+    assert prompt_user() == "n"
 
     # Test 'e' response
-    assert prompt_user("test message") == "e"
+    assert prompt_user() == "e"
 
     # Test invalid response followed by valid response
-    assert prompt_user("test message") == "invalid"
-    assert prompt_user("test message") == "y"
+    assert prompt_user() == "x"
+    assert prompt_user() == "y"
+
+
+def test_prompt_user_normalizes_input(monkeypatch):
+    """Test that responses are trimmed, lowercased, and reduced to one char"""
+    test_inputs = ["Yes", "  N  ", "edit", ""]
+    input_iterator = iter(test_inputs)
+    monkeypatch.setattr("builtins.input", lambda _: next(input_iterator))
+
+    assert prompt_user() == "y"
+    assert prompt_user() == "n"
+    assert prompt_user() == "e"
+    assert prompt_user() == ""
 
 
 def test_llm_commit_happy_path():
     """Test successful commit workflow with immediate acceptance"""
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["test.py"],
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="gpt-4-turbo",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
+        mock_openai.return_value = mock_openai_instance
+
+        mock_prompt.return_value = "y"
 
         # Properly mock API key retrieval
         mock_get_api_key = patch(
@@ -545,17 +1007,11 @@ def test_llm_commit_happy_path():
         )
         mock_get_api_key.start()
 
-        # Mock OpenAI with custom model
-        mock_openai_instance.chat.completions.create.return_value = mock_response
-        mock_openai.return_value = mock_openai_instance
-
-        mock_prompt.return_value = "y"
-
         # Execute
         llm_commit("fake-api-key")
 
         # Verify
-        mock_git_instance.get_diff.assert_called_once()
+        mock_git_instance.get_staged_files_and_diff.assert_called_once()
         mock_git_instance.commit.assert_called_once_with(SAMPLE_COMMIT_MESSAGE)
         mock_prompt.assert_called_once()
 
@@ -564,32 +1020,23 @@ def test_llm_commit_with_openrouter():
     """Test commit workflow with OpenRouter API key"""
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
         patch.dict(os.environ, {"OPENROUTER_API_KEY": "fake-openrouter-key"}),
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["test.py"],
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="gpt-4-turbo",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
-        mock_openai_instance.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_openai_instance
 
         mock_prompt.return_value = "y"
@@ -598,7 +1045,7 @@ def test_llm_commit_with_openrouter():
         llm_commit("fake-api-key")
 
         # Verify
-        mock_git_instance.get_diff.assert_called_once()
+        mock_git_instance.get_staged_files_and_diff.assert_called_once()
         mock_git_instance.commit.assert_called_once_with(SAMPLE_COMMIT_MESSAGE)
         mock_prompt.assert_called_once()
         mock_openai.assert_called_once_with(
@@ -610,32 +1057,23 @@ def test_llm_commit_with_custom_model():
     """Test commit workflow with custom model"""
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
         patch.dict(os.environ, {"LLM_COMMIT_MODEL": "custom-model"}),
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["test.py"],
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="custom-model",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
-        mock_openai_instance.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_openai_instance
 
         mock_prompt.return_value = "y"
@@ -653,7 +1091,7 @@ def test_llm_commit_with_custom_model():
         llm_commit("fake-api-key")
 
         # Verify
-        mock_git_instance.get_diff.assert_called_once()
+        mock_git_instance.get_staged_files_and_diff.assert_called_once()
         mock_git_instance.commit.assert_called_once_with(SAMPLE_COMMIT_MESSAGE)
         mock_prompt.assert_called_once()
         mock_openai_instance.chat.completions.create.assert_called_once_with(
@@ -670,6 +1108,8 @@ def test_llm_commit_with_custom_model():
             ],
             temperature=0.7,
             max_tokens=100,
+            stream=True,
+            extra_body={"prompt_cache_key": generator._prompt_cache_key},
         )
 
 
@@ -682,7 +1122,11 @@ def test_llm_commit_empty_diff():
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = "   "  # Empty or whitespace diff
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["test.py"],
+            0,
+            "   ",  # Empty or whitespace diff
+        )
         mock_git.return_value = mock_git_instance
 
         # Mock sys.exit to prevent actual exit
@@ -703,33 +1147,24 @@ def test_llm_commit_abort():
     """Test commit workflow when user aborts"""
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
         patch("builtins.print") as mock_print,
         patch("sys.exit") as mock_exit,
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["test.py"],
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="gpt-4-turbo",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
-        mock_openai_instance.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_openai_instance
 
         mock_prompt.return_value = "n"
@@ -749,33 +1184,24 @@ def test_llm_commit_edit_flow():
     """Test commit workflow with message editing"""
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
         patch("git_llm_commit.llm_commit.CommitMessageEditor") as mock_editor,
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["test.py"],
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git_instance.get_editor.return_value = "vim"
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="gpt-4-turbo",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
-        mock_openai_instance.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_openai_instance
 
         mock_editor_instance = MagicMock()
@@ -802,32 +1228,23 @@ def test_llm_commit_invalid_input_flow():
     """Test commit workflow with invalid input followed by valid input"""
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
         patch("builtins.print") as mock_print,
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["test.py"],
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="gpt-4-turbo",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
-        mock_openai_instance.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_openai_instance
 
         # Simulate invalid input followed by valid input
@@ -854,7 +1271,11 @@ def test_llm_commit_abort_with_risky_files():
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_staged_files.return_value = SAMPLE_STAGED_FILES
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            SAMPLE_STAGED_FILES,
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         # User declines to proceed with risky files
@@ -868,7 +1289,7 @@ def test_llm_commit_abort_with_risky_files():
             llm_commit("fake-api-key")
 
         # Verify
-        mock_git_instance.get_staged_files.assert_called_once()
+        mock_git_instance.get_staged_files_and_diff.assert_called_once()
         mock_prompt_risky.assert_called_once()
         mock_print.assert_called_with("Commit aborted.")
         mock_exit.assert_called_with(1)
@@ -880,35 +1301,22 @@ def test_llm_commit_no_prompt_without_risky_files():
     with (
         patch("git_llm_commit.llm_commit.GitCommandLine") as mock_git,
         patch("git_llm_commit.llm_commit.prompt_risky_files") as mock_prompt_risky,
-        patch("git_llm_commit.llm_commit.OpenAI") as mock_openai,
+        patch("openai.OpenAI") as mock_openai,
         patch("git_llm_commit.llm_commit.prompt_user") as mock_prompt,
     ):
         # Setup mocks
         mock_git_instance = MagicMock()
-        mock_git_instance.get_staged_files.return_value = [
-            "src/app.py",
-            "test/test_app.py",
-        ]  # No risky files
-        mock_git_instance.get_diff.return_value = SAMPLE_DIFF
+        mock_git_instance.get_staged_files_and_diff.return_value = (
+            ["src/app.py", "test/test_app.py"],  # No risky files
+            1,
+            SAMPLE_DIFF,
+        )
         mock_git.return_value = mock_git_instance
 
         mock_openai_instance = MagicMock()
-        mock_response = ChatCompletion(
-            id="mock-id",
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            created=1234567890,
-            model="gpt-4-turbo",
-            object="chat.completion",
+        mock_openai_instance.chat.completions.create.side_effect = (
+            lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
         )
-        mock_openai_instance.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_openai_instance
 
         mock_prompt.return_value = "y"
@@ -917,7 +1325,7 @@ def test_llm_commit_no_prompt_without_risky_files():
         llm_commit("fake-api-key")
 
         # Verify
-        mock_git_instance.get_staged_files.assert_called_once()
+        mock_git_instance.get_staged_files_and_diff.assert_called_once()
         mock_prompt_risky.assert_not_called()  # Should not prompt for risky files
         mock_git_instance.commit.assert_called_once_with(SAMPLE_COMMIT_MESSAGE)
 
@@ -930,7 +1338,9 @@ def test_llm_commit_runtime_error():
         patch("sys.exit") as mock_exit,
     ):
         mock_git_instance = MagicMock()
-        mock_git_instance.get_diff.side_effect = RuntimeError("Git error")
+        mock_git_instance.get_staged_files_and_diff.side_effect = RuntimeError(
+            "Git error"
+        )
         mock_git.return_value = mock_git_instance
 
         # Mock sys.exit to prevent actual exit
@@ -948,22 +1358,9 @@ def test_llm_commit_runtime_error():
 def test_generate_commit_message_one_sentence():
     """Test commit message generation with one_sentence_only=True"""
     mock_client = MagicMock()
-    mock_response = ChatCompletion(
-        id="mock-id",
-        choices=[
-            Choice(
-                index=0,
-                message=ChatCompletionMessage(
-                    content=SAMPLE_COMMIT_MESSAGE, role="assistant"
-                ),
-                finish_reason="stop",
-            )
-        ],
-        created=1234567890,
-        model="gpt-4-turbo",
-        object="chat.completion",
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: make_stream(SAMPLE_COMMIT_MESSAGE)
     )
-    mock_client.chat.completions.create.return_value = mock_response
 
     config = CommitConfig()
     config.one_sentence_only = True